@@ -1,7 +1,10 @@
 import streamlit as st
-import re
 import pandas as pd
 import requests
+from porter_stemmer import (
+    cached_stem_with_steps, measure, porter_stem_with_steps,
+    step_1a, step_1b, step_1b_post_processing, step_1c, step_2, step_3, step_4, step_5,
+)
 st.set_page_config(
 if "theme" not in st.session_state:
     st.session_state.theme = "Light"
@@ -191,195 +194,45 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Porter Stemmer functions with step tracking
-def measure(word):
-    pattern = re.compile(r'([aeiouy]+[^aeiouy]+)')
-    return len(pattern.findall(word))
-
-
-# Include 'y' as a vowel to correctly handle words like 'flying'
-def contains_vowel(word):
-    return bool(re.search(r'[aeiouy]', word))
-
-
-def ends_double_consonant(word):
-    return len(word) >= 2 and word[-1] == word[-2] and word[-1] not in 'aeiou'
-
-
-def cvc(word):
-    if len(word) < 3:
-        return False
-    c1, v, c2 = word[-3], word[-2], word[-1]
-    # final consonant cannot be w, x, or y
-    return (c1 not in 'aeiou' and v in 'aeiou' and c2 not in 'aeiouwy')
-
-
-# Step 1a
-def step_1a(word, steps):
-    original = word
-    if word.endswith("sses"):
-        word = word[:-2]
-        steps.append((original, word, "1a: SSES → SS"))
-    elif word.endswith("ies"):
-        word = word[:-3] + "i"
-        steps.append((original, word, "1a: IES → I"))
-    elif word.endswith("ss"):
-        pass
-    elif word.endswith("s"):
-        word = word[:-1]
-        steps.append((original, word, "1a: S → ''"))
-    return word
-
-
-# Step 1b and post-processing
-def step_1b(word, steps):
-    original = word
-    if word.endswith("eed"):
-        stem = word[:-3]
-        if measure(stem) > 0:
-            word = stem + "ee"
-            steps.append((original, word, "1b: (m>0) EED → EE"))
-    elif word.endswith("ed"):
-        stem = word[:-2]
-        if contains_vowel(stem):
-            word = stem
-            steps.append((original, word, "1b: (v) ED → ''"))
-            word = step_1b_post_processing(word, steps)
-    elif word.endswith("ing"):
-        stem = word[:-3]
-        if contains_vowel(stem):
-            word = stem
-            steps.append((original, word, "1b: (v) ING → ''"))
-            word = step_1b_post_processing(word, steps)
-    return word
-
-
-def step_1b_post_processing(word, steps):
-    original = word
-    if word.endswith("at"):
-        word += "e"
-        steps.append((original, word, "1b Post: AT → ATE"))
-    elif word.endswith("bl"):
-        word += "e"
-        steps.append((original, word, "1b Post: BL → BLE"))
-    elif word.endswith("iz"):
-        word += "e"
-        steps.append((original, word, "1b Post: IZ → IZE"))
-    elif ends_double_consonant(word) and word[-1] not in "lsz":
-        word = word[:-1]
-        steps.append((original, word, "1b Post: double consonant → single letter"))
-    elif measure(word) == 1 and cvc(word):
-        word += "e"
-        steps.append((original, word, "1b Post: CVC and m=1 → add E"))
-    return word
-
-
-# Step 1c
-def step_1c(word, steps):
-    original = word
-    if word.endswith("y") and contains_vowel(word[:-1]):
-        word = word[:-1] + "i"
-        steps.append((original, word, "1c: (v) Y → I"))
-    return word
-
-
-# Step 2 rules
-step2_rules = {
-    "ational": "ate", "tional": "tion", "enci": "ence", "anci": "ance", "izer": "ize",
-    "abli": "able", "alli": "al", "entli": "ent", "eli": "e", "ousli": "ous",
-    "ization": "ize", "ation": "ate", "ator": "ate", "alism": "al", "iveness": "ive",
-    "fulness": "ful", "ousness": "ous", "aliti": "al", "iviti": "ive", "biliti": "ble"
-}
-
-
-def step_2(word, steps):
-    for suffix, repl in sorted(step2_rules.items(), key=lambda x: -len(x[0])):
-        if word.endswith(suffix):
-            stem = word[:-len(suffix)]
-            if measure(stem) > 0:
-                original = word
-                word = stem + repl
-                steps.append((original, word, f"2: (m>0) {suffix.upper()} → {repl.upper()}"))
-            break
-    return word
-
-
-# Step 3 rules
-step3_rules = {
-    "icate": "ic", "ative": "", "alize": "al", "iciti": "ic",
-    "ical": "ic", "ful": "", "ness": ""
-}
+# Porter Stemmer engine with step tracking lives in porter_stemmer.py
 
 
-def step_3(word, steps):
-    for suffix, repl in sorted(step3_rules.items(), key=lambda x: -len(x[0])):
-        if word.endswith(suffix):
-            stem = word[:-len(suffix)]
-            if measure(stem) > 0:
-                original = word
-                word = stem + repl
-                repl_label = repl.upper() if repl else "(null)"
-                steps.append((original, word, f"3: (m>0) {suffix.upper()} → {repl_label}"))
-            break
-    return word
-
-
-# Step 4 rules
-step4_suffixes = [
-    "al", "ance", "ence", "er", "ic", "able", "ible", "ant",
-    "ement", "ment", "ent", "ion", "ou", "ism", "ate", "iti",
-    "ous", "ive", "ize"
+# Input words for the per-rule examples in the algorithm overview, grouped by
+# the step function that applies the rule
+RULE_EXAMPLES = [
+    (step_1a, ["caresses", "ponies", "caress", "cats"]),
+    (step_1b, ["agreed", "plastered", "motoring"]),
+    (step_1b_post_processing, ["conflat", "troubl", "formaliz", "hopp", "fil"]),
+    (step_1c, ["happy"]),
+    (step_2, ["relational", "conditional", "valenci", "hesitanci", "digitizer"]),
+    (step_3, ["triplicate", "formative", "formalize"]),
+    (step_4, ["revival", "allowance", "inference"]),
+    (step_5, ["probate", "cease", "controll"]),
 ]
 
 
-def step_4(word, steps):
-    for suffix in step4_suffixes:
-        if word.endswith(suffix):
-            stem = word[:-len(suffix)]
-            if measure(stem) > 1:
-                if suffix == "ion" and (stem.endswith("s") or stem.endswith("t")):
-                    original = word
-                    word = stem
-                    steps.append((original, word, "4: (m>1 & *S/*T) ION → ''"))
-                    break
-                elif suffix != "ion":
-                    original = word
-                    word = stem
-                    steps.append((original, word, f"4: (m>1) {suffix.upper()} → ''"))
-                    break
-    return word
-
-
-# Step 5 rules
-def step_5(word, steps):
-    original = word
-    if word.endswith("e"):
-        stem = word[:-1]
-        m = measure(stem)
-        if m > 1:
-            word = stem
-            steps.append((original, word, "5: (m>1) E → ''"))
-        elif m == 1 and not cvc(stem):
-            word = stem
-            steps.append((original, word, "5: (m=1 and CVC) E → ''"))
-    elif word.endswith("ll") and measure(word) > 1:
-        word = word[:-1]
-        steps.append((original, word, "5: (m>1 and *L) LL → L"))
-    return word
-
-
-# Full Porter Stemmer with steps
-def porter_stem_with_steps(word):
-    steps = []
-    word = word.lower()
-    word = step_1a(word, steps)
-    word = step_1b(word, steps)
-    word = step_1c(word, steps)
-    word = step_2(word, steps)
-    word = step_3(word, steps)
-    word = step_4(word, steps)
-    word = step_5(word, steps)
-    return steps, word
+# Words used by the examples and walkthroughs; their stems and traces are
+# generated from the engine so the explanations never drift from its output
+EXAMPLE_WORDS = ["running", "connection", "argued", "happily", "analysis"]
+CONNECT_FAMILY = ["connection", "connections", "connective", "connected", "connecting"]
+MEASURE_WORDS = ["tree", "trouble", "beautiful"]
+WALKTHROUGH_WORD = "traditionally"
+
+
+# Computed once at startup; every session gets its own copy of the result
+@st.cache_data(show_spinner=False)
+def precomputed_examples():
+    walkthrough_steps, walkthrough_stem = porter_stem_with_steps(WALKTHROUGH_WORD)
+    return {
+        "table": pd.DataFrame({
+            "Original Word": EXAMPLE_WORDS,
+            "Porter Stem": [porter_stem_with_steps(w)[1] for w in EXAMPLE_WORDS],
+        }),
+        "family": [(w, porter_stem_with_steps(w)[1]) for w in CONNECT_FAMILY],
+        "measures": [(w, measure(w)) for w in MEASURE_WORDS],
+        "walkthrough": (walkthrough_steps, walkthrough_stem),
+        "rules": {word: step(word, []) for step, words in RULE_EXAMPLES for word in words},
+    }
 
 
 # Try to load Lottie animation safely
@@ -395,17 +248,29 @@ def load_lottieurl(url):
 
 # Tab 1: What is Porter Stemmer
 def tab_what_is_porter():
+    examples = precomputed_examples()
+    family_words = ", ".join(f'"{word}"' for word, _ in examples["family"])
+    family_stems = sorted({stem for _, stem in examples["family"]})
+    if len(family_stems) == 1:
+        family_result = f'All share the same stem: "{family_stems[0]}"'
+    else:
+        family_result = "Reduce to the stems: " + ", ".join(f'"{stem}"' for stem in family_stems)
+    measure_lines = "\n".join(
+        f'        - "{word}" has measure m={m} ({m} VC sequence{"" if m == 1 else "s"})'
+        for word, m in examples["measures"]
+    )
+
     col1, col2 = st.columns([2, 1])    
     with col1:
         st.markdown("## What is the Porter Stemmer?")
-        st.markdown("""
+        st.markdown(f"""
         The Porter Stemmer is a widely-used rule-based algorithm for stemming English words, developed by 
         Martin Porter in 1980. Stemming is the process of reducing words to their word stem or root form.
         
         For example, the words:
-        - "connection", "connections", "connective", "connected", "connecting"
+        - {family_words}
         
-        All share the same stem: "connect"
+        {family_result}
         
         ### How it Works
         
@@ -424,9 +289,7 @@ def tab_what_is_porter():
         represents the number of vowel-consonant sequences in a word.
         
         For example:
-        - "tree" has measure m=0 (no complete VC sequence)
-        - "trouble" has measure m=1 (one VC sequence)
-        - "beautiful" has measure m=2 (two VC sequences)
+{measure_lines}
         """)
         
         st.markdown("""
@@ -441,11 +304,7 @@ def tab_what_is_porter():
         
             
         st.markdown("### Example Stemming Results")
-        example_df = pd.DataFrame({
-            "Original Word": ["running", "connection", "argued", "happily", "analysis"],
-            "Porter Stem": ["run", "connect", "argu", "happili", "analysi"]
-        })
-        st.table(example_df)
+        st.table(examples["table"])
 
 # Tab 2: Pros and Cons of Stemming
 def tab_pros_and_cons():
@@ -576,6 +435,36 @@ def tab_alternatives():
     </div>
     """, unsafe_allow_html=True)
 
+# Render the trace step boxes followed by the final stem. Streamlit reruns
+# the whole script whenever the input is committed (Enter or leaving the
+# field, not per keystroke), so the trace is redrawn in full each time
+def render_trace(word, steps, final_stem):
+    st.subheader(f"Stemming process for '{word}'")
+    
+    if steps:
+        for i, (before, after, rule) in enumerate(steps):
+            st.markdown(f"""
+            <div class='step-box'>
+                <b>Step {i+1}:</b> Rule {rule}<br>
+                <span style='color: #E1EEBC;'>Before:</span> <span class='highlight'>{before}</span> → 
+                <span style='color: #E1EEBC;'>After:</span> <span class='highlight'>{after}</span>
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.info(f"No rules applied. Word '{word}' remains unchanged.")
+    
+    # st.success(f"Final stem: **{final_stem}**")
+    st.markdown(
+        f"""
+        <div style="background-color:#FF4C4B; padding:10px; border-radius:8px">
+            <p style="color:white; font-weight:bold; font-size:16px; margin:0">
+                Final stem: <span style="text-transform: lowercase;">{final_stem}</span>
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
 # Tab 4: Step-by-Step Guide
 def tab_step_by_step():
     st.markdown("## Porter Stemmer Step-by-Step Guide")
@@ -585,100 +474,85 @@ def tab_step_by_step():
     
     with col1:
         st.subheader("Try it yourself")
+        instant = st.toggle("Instant mode", help="Re-stem after every edit without pressing the button")
         input_word = st.text_input("Enter a word to stem", value="running")
         
-        if st.button("Stem Word", type="primary"):
-            steps, final_stem = porter_stem_with_steps(input_word)
+        if instant:
+            # Every rerun stems the current input; the memoized engine keeps this cheap
+            steps, final_stem = cached_stem_with_steps(input_word)
+            st.session_state.steps = steps
+            st.session_state.final_stem = final_stem
+            st.session_state.input_word = input_word
+        elif st.button("Stem Word", type="primary"):
+            steps, final_stem = cached_stem_with_steps(input_word)
             st.session_state.steps = steps
             st.session_state.final_stem = final_stem
             st.session_state.input_word = input_word
     
     with col2:
         if 'steps' in st.session_state:
-            st.subheader(f"Stemming process for '{st.session_state.input_word}'")
-            
-            if st.session_state.steps:
-                for i, (before, after, rule) in enumerate(st.session_state.steps):
-                    with st.container():
-                        st.markdown(f"""
-                        <div class='step-box'>
-                            <b>Step {i+1}:</b> Rule {rule}<br>
-                            <span style='color: #E1EEBC;'>Before:</span> <span class='highlight'>{before}</span> → 
-                            <span style='color: #E1EEBC;'>After:</span> <span class='highlight'>{after}</span>
-                        </div>
-                        """, unsafe_allow_html=True)
-            else:
-                st.info(f"No rules applied. Word '{st.session_state.input_word}' remains unchanged.")
-            
-            # st.success(f"Final stem: **{st.session_state.final_stem}**")
-            st.markdown(
-                f"""
-                <div style="background-color:#FF4C4B; padding:10px; border-radius:8px">
-                    <p style="color:white; font-weight:bold; font-size:16px; margin:0">
-                        Final stem: <span style="text-transform: lowercase;">{st.session_state.final_stem}</span>
-                    </p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+            render_trace(st.session_state.input_word, st.session_state.steps, st.session_state.final_stem)
 
     
     # Porter Stemmer Algorithm Explanation
     st.markdown("### Porter Stemmer Algorithm Steps")
     
+    rule_outputs = precomputed_examples()["rules"]
+    rule = lambda word: f"{word} → {rule_outputs[word]}"
+    
     with st.expander("View Full Algorithm Steps"):
-        st.markdown("""
+        st.markdown(f"""
         #### Step 1: Deal with plurals and past participles
         
         **Step 1a:**
-        - SSES → SS (caresses → caress)
-        - IES → I (ponies → poni)
-        - SS → SS (caress → caress)
-        - S → "" (cats → cat)
+        - SSES → SS ({rule('caresses')})
+        - IES → I ({rule('ponies')})
+        - SS → SS ({rule('caress')})
+        - S → "" ({rule('cats')})
         
         **Step 1b:**
-        - (m>0) EED → EE (agreed → agree)
-        - (*v*) ED → "" (plastered → plaster)
-        - (*v*) ING → "" (motoring → motor)
+        - (m>0) EED → EE ({rule('agreed')})
+        - (*v*) ED → "" ({rule('plastered')})
+        - (*v*) ING → "" ({rule('motoring')})
         
         After 1b, if the second or third rule fired, apply these:
-        - AT → ATE (conflat(ed) → conflate)
-        - BL → BLE (troubl(ed) → trouble)
-        - IZ → IZE (formal(iz)ing → formalize)
-        - Double consonant to single (hopp(ing) → hop)
-        - (m=1 and *o) → E (fil(ing) → file)
+        - AT → ATE ({rule('conflat')})
+        - BL → BLE ({rule('troubl')})
+        - IZ → IZE ({rule('formaliz')})
+        - Double consonant to single ({rule('hopp')})
+        - (m=1 and *o) → E ({rule('fil')})
         
         **Step 1c:**
-        - (*v*) Y → I (happy → happi)
+        - (*v*) Y → I ({rule('happy')})
         
         #### Step 2: Turn various suffixes into common forms
         
-        - (m>0) ATIONAL → ATE (relational → relate)
-        - (m>0) TIONAL → TION (conditional → condition)
-        - (m>0) ENCI → ENCE (valenci → valence)
-        - (m>0) ANCI → ANCE (hesitanci → hesitance)
-        - (m>0) IZER → IZE (digitizer → digitize)
+        - (m>0) ATIONAL → ATE ({rule('relational')})
+        - (m>0) TIONAL → TION ({rule('conditional')})
+        - (m>0) ENCI → ENCE ({rule('valenci')})
+        - (m>0) ANCI → ANCE ({rule('hesitanci')})
+        - (m>0) IZER → IZE ({rule('digitizer')})
         - And many more...
         
         #### Step 3: Remove longer suffixes
         
-        - (m>0) ICATE → IC (triplicate → triplic)
-        - (m>0) ATIVE → "" (formative → form)
-        - (m>0) ALIZE → AL (formalize → formal)
+        - (m>0) ICATE → IC ({rule('triplicate')})
+        - (m>0) ATIVE → "" ({rule('formative')})
+        - (m>0) ALIZE → AL ({rule('formalize')})
         - And more...
         
         #### Step 4: Remove suffixes in specific contexts
         
-        - (m>1) AL → "" (revival → reviv)
-        - (m>1) ANCE → "" (allowance → allow)
-        - (m>1) ENCE → "" (inference → infer)
+        - (m>1) AL → "" ({rule('revival')})
+        - (m>1) ANCE → "" ({rule('allowance')})
+        - (m>1) ENCE → "" ({rule('inference')})
         - And many more...
         
         #### Step 5: Final cleanup
         
-        - (m>1) E → "" (probate → probat)
-        - (m=1 and not *o) E → "" (cease → ceas)
-        - (m>1 and *d and *L) → single letter (controll → control)
+        - (m>1) E → "" ({rule('probate')})
+        - (m=1 and not *o) E → "" ({rule('cease')})
+        - (m>1 and *d and *L) → single letter ({rule('controll')})
         
         Where:
         - m = measure (number of vowel-consonant sequences)
@@ -688,22 +562,21 @@ def tab_step_by_step():
         - *L = ends with 'l'
         """)
 
-    # Example with visualization
-    st.markdown("### Visual Example: Stemming 'traditionally'")
+    # Example with visualization, traced by the engine at startup
+    walkthrough_steps, walkthrough_stem = precomputed_examples()["walkthrough"]
+    st.markdown(f"### Visual Example: Stemming '{WALKTHROUGH_WORD}'")
     
-    traditional_steps = [
-        ("traditionally", "traditional", "2: (m>0) ALLY → AL"),
-        ("traditional", "tradition", "4: (m>1) AL → ''"),
-    ]
-    
-    st.markdown("""
+    step_items = "\n".join(
+        f"<li><b>{before}</b> → <b>{after}</b> (Rule {rule})</li>"
+        for before, after, rule in walkthrough_steps
+    )
+    st.markdown(f"""
     <div style="border:1px solid #ddd; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
-        <h4>Word: "traditionally"</h4>
+        <h4>Word: "{WALKTHROUGH_WORD}"</h4>
         <ol>
-            <li><b>traditionally</b> → <b>traditional</b> (Rule 2: ALLY → AL)</li>
-            <li><b>traditional</b> → <b>tradition</b> (Rule 4: AL → '')</li>
+            {step_items}
         </ol>
-        <p><b>Final stem:</b> "tradition"</p>
+        <p><b>Final stem:</b> "{walkthrough_stem}"</p>
     </div>
     """, unsafe_allow_html=True)
 
@@ -0,0 +1,33 @@
+"""Word corpora for the stemmer benchmarks and profilers."""
+import random
+import re
+
+WORD_RE = re.compile(r"[A-Za-z]+")
+
+# Roots and suffixes chosen so that every step of the stemmer gets exercised
+ROOTS = [
+    "connect", "relat", "condition", "valen", "hesit", "digit", "conform",
+    "radic", "differ", "ration", "vile", "analog", "vietnam", "predic",
+    "oper", "feud", "decis", "hope", "sensit", "formal", "sensibl", "electr",
+    "hop", "fil", "troubl", "caress", "poni", "motor", "plaster", "agre",
+    "tradit", "happ", "gener", "adjust", "depend", "activ", "bound", "control",
+]
+SUFFIXES = [
+    "", "s", "es", "ed", "ing", "ly", "ies", "ational", "ional", "ization",
+    "ation", "ator", "alism", "iveness", "fulness", "ousness", "aliti",
+    "iviti", "biliti", "icate", "ative", "alize", "iciti", "ical", "ful",
+    "ness", "ement", "ment", "ent", "ance", "ence", "able", "ible", "ism",
+    "ous", "ive", "ize", "er", "ally", "ingly",
+]
+
+
+def synthetic_corpus(n_words, seed=0):
+    """Return ``n_words`` root+suffix words drawn with a fixed seed."""
+    rng = random.Random(seed)
+    return [rng.choice(ROOTS) + rng.choice(SUFFIXES) for _ in range(n_words)]
+
+
+def read_corpus(path):
+    """Return the lowercased alphabetic tokens of a UTF-8 text file."""
+    with open(path, encoding="utf-8") as f:
+        return [w.lower() for w in WORD_RE.findall(f.read())]
@@ -0,0 +1,300 @@
+"""Incremental re-stemming for documents that are edited in place.
+
+A :class:`StemmedDocument` keeps the text together with its token spans and
+stems. After an edit only the tokens touching the changed span are
+re-tokenized and re-stemmed; the rest are reused, with their offsets shifted.
+Each update also reports which stems were added and removed, so a downstream
+index can apply the delta instead of reindexing the whole document.
+
+Run as a script to compare small edits against re-stemming the whole text,
+or with ``--verify`` to check random edits against full re-stems:
+
+    python incremental.py --words 200000 --edits 200
+    python incremental.py --verify
+"""
+import argparse
+import random
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+
+from bench_corpus import synthetic_corpus
+from porter_stemmer import porter_stem
+
+TOKEN_RE = re.compile(r"[A-Za-z]+")
+
+# Block size used when scanning for the unchanged prefix/suffix of two texts
+_SCAN_BLOCK = 4096
+
+_cached_stem = lru_cache(maxsize=65536)(porter_stem)
+
+
+class StemmedDocument:
+    """Text plus the offsets and stems of its tokens, in order.
+
+    Offsets after the last edit are shifted lazily: entries from index
+    ``_shift_from`` on are stored ``_shift`` characters too early. An edit
+    then only rewrites the offsets between it and the previous edit, which
+    keeps localized editing cheap on large documents.
+    """
+
+    __slots__ = ("text", "stems", "_starts", "_ends", "_shift_from", "_shift")
+
+    def __init__(self, text, starts, ends, stems):
+        self.text = text
+        self.stems = stems
+        self._starts = starts
+        self._ends = ends
+        self._shift_from = len(starts)
+        self._shift = 0
+
+    def spans(self):
+        """Return the ``(start, end)`` offset of every token."""
+        k, d = self._shift_from, self._shift
+        return [(s + d, e + d) if t >= k else (s, e)
+                for t, (s, e) in enumerate(zip(self._starts, self._ends))]
+
+    def tokens(self):
+        return [self.text[s:e] for s, e in self.spans()]
+
+    def _bisect_left(self, offsets, x):
+        k = self._shift_from
+        i = bisect_left(offsets, x, 0, k)
+        return i if i < k else bisect_left(offsets, x - self._shift, k)
+
+    def _bisect_right(self, offsets, x):
+        k = self._shift_from
+        i = bisect_right(offsets, x, 0, k)
+        return i if i < k else bisect_right(offsets, x - self._shift, k)
+
+    def _offset(self, offsets, t):
+        return offsets[t] + (self._shift if t >= self._shift_from else 0)
+
+
+def _tokenize(text, pos, endpos):
+    starts, ends, stems = [], [], []
+    for match in TOKEN_RE.finditer(text, pos, endpos):
+        starts.append(match.start())
+        ends.append(match.end())
+        stems.append(_cached_stem(match.group()))
+    return starts, ends, stems
+
+
+def stem_document(text):
+    """Tokenize and stem all of ``text``."""
+    return StemmedDocument(text, *_tokenize(text, 0, len(text)))
+
+
+def _common_prefix_len(a, b):
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i:i + _SCAN_BLOCK] == b[i:i + _SCAN_BLOCK]:
+        i += _SCAN_BLOCK
+    i = min(i, limit)
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix_len(a, b, limit):
+    la, lb = len(a), len(b)
+    n = 0
+    while n + _SCAN_BLOCK <= limit and \
+            a[la - n - _SCAN_BLOCK:la - n] == b[lb - n - _SCAN_BLOCK:lb - n]:
+        n += _SCAN_BLOCK
+    while n < limit and a[la - n - 1] == b[lb - n - 1]:
+        n += 1
+    return n
+
+
+def _add(offsets, lo, hi, amount):
+    if lo < hi and amount:
+        offsets[lo:hi] = [x + amount for x in offsets[lo:hi]]
+
+
+def _restem_span(doc, new_text, start, old_end, new_end):
+    """Re-stem ``doc`` after ``doc.text[start:old_end]`` became ``new_text[start:new_end]``."""
+    delta = new_end - old_end
+    # Tokens touching the edit, including ones that merely abut it: inserting
+    # letters next to a word extends that word
+    i = doc._bisect_left(doc._ends, start)
+    j = doc._bisect_right(doc._starts, old_end)
+    if i < j:
+        window_start = min(start, doc._offset(doc._starts, i))
+        window_end = max(old_end, doc._offset(doc._ends, j - 1)) + delta
+    else:
+        window_start, window_end = start, new_end
+
+    starts, ends, stems = _tokenize(new_text, window_start, window_end)
+
+    removed = Counter(doc.stems[i:j])
+    added = Counter(stems)
+    unchanged = removed & added
+    removed -= unchanged
+    added -= unchanged
+
+    # Everything after the window becomes the lazily shifted tail. Offsets
+    # between this edit and the previous one are brought in line with that
+    k, d = doc._shift_from, doc._shift
+    for offsets, window in ((doc._starts, starts), (doc._ends, ends)):
+        _add(offsets, k, i, d)
+        _add(offsets, j, k, -d)
+        offsets[i:j] = window
+    doc.stems[i:j] = stems
+    doc._shift_from = i + len(stems)
+    doc._shift = d + delta
+    doc.text = new_text
+    return doc, added, removed
+
+
+def restem(doc, new_text):
+    """Update ``doc`` to ``new_text``, re-stemming only the changed region.
+
+    The changed region is everything between the longest common prefix and
+    suffix of the old and new text. ``doc`` is updated in place; returns
+    ``(doc, added, removed)`` where ``added`` and ``removed`` are
+    :class:`~collections.Counter` objects of stems entering and leaving it.
+    """
+    old_text = doc.text
+    prefix = _common_prefix_len(old_text, new_text)
+    suffix = _common_suffix_len(old_text, new_text, min(len(old_text), len(new_text)) - prefix)
+    return _restem_span(doc, new_text, prefix, len(old_text) - suffix, len(new_text) - suffix)
+
+
+def apply_edit(doc, start, end, replacement):
+    """Replace ``doc.text[start:end]`` with ``replacement`` and re-stem around it.
+
+    Same as :func:`restem`, but the edit position is known so the texts are
+    not compared.
+    """
+    if not 0 <= start <= end <= len(doc.text):
+        raise ValueError(f"edit span {start}:{end} outside text of length {len(doc.text)}")
+    new_text = doc.text[:start] + replacement + doc.text[end:]
+    return _restem_span(doc, new_text, start, end, start + len(replacement))
+
+
+def _make_edits(rng, text, count, local):
+    """Random small edits; ``local`` ones stay near a slowly moving cursor."""
+    edits = []
+    cursor = rng.randrange(len(text))
+    for _ in range(count):
+        if not text:
+            # Deletions emptied the document; start it over with an insertion
+            edits.append((0, 0, " connected"))
+            text = " connected"
+            continue
+        if local:
+            cursor = max(0, min(len(text) - 1, cursor + rng.randrange(-40, 41)))
+        else:
+            cursor = rng.randrange(len(text))
+        end = min(len(text), cursor + rng.randrange(0, 12))
+        replacement = rng.choice(["", " ", "ing", "ness ", " connected", "ization"])
+        edits.append((cursor, end, replacement))
+        text = text[:cursor] + replacement + text[end:]
+    return edits
+
+
+def _check_same(doc, reference, added=None, removed=None, before=None):
+    """Raise if ``doc`` differs from ``reference``, a full re-stem of its text.
+
+    With ``added``/``removed`` and ``before`` (the stems before the update),
+    also check the reported delta against the full before/after counts.
+    """
+    if doc.stems != reference.stems or doc.spans() != reference.spans():
+        raise RuntimeError(f"incremental result diverged from a full re-stem of {doc.text[:80]!r}")
+    if before is not None:
+        old, new = Counter(before), Counter(reference.stems)
+        if added != new - old or removed != old - new:
+            raise RuntimeError(f"wrong stem delta for {doc.text[:80]!r}: "
+                               f"added {dict(added)}, removed {dict(removed)}")
+
+
+def verify(trials=2000, seed=0):
+    """Check random edits against full re-stems on short and long texts.
+
+    Short texts of a few letters, separators and case changes hit the token
+    boundary cases; long ones get inserts and deletions larger than
+    ``_SCAN_BLOCK`` so the block scans in :func:`restem` are exercised. Both
+    :func:`apply_edit` and :func:`restem` run chained edits on one document,
+    so the lazy offset shift is carried from edit to edit. Raises
+    ``RuntimeError`` on the first mismatch.
+    """
+    rng = random.Random(seed)
+    alphabet = "abcXY ,.\n"
+
+    def random_text(n):
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    for trial in range(trials):
+        long = trial % 10 == 0
+        max_insert = _SCAN_BLOCK + 100 if long else 6
+        doc = stem_document(random_text(rng.randrange(3 * _SCAN_BLOCK if long else 40)))
+        for _ in range(8):
+            before = list(doc.stems)
+            size = len(doc.text)
+            if rng.random() < 0.5:
+                start = rng.randrange(size + 1)
+                end = rng.randrange(start, min(size, start + (2 * _SCAN_BLOCK if long else 6)) + 1)
+                replacement = random_text(rng.randrange(max_insert))
+                doc, added, removed = apply_edit(doc, start, end, replacement)
+            elif rng.random() < 0.2:
+                doc, added, removed = restem(doc, random_text(rng.randrange(40)))
+            else:
+                start = rng.randrange(size + 1)
+                end = rng.randrange(start, size + 1)
+                replacement = random_text(rng.randrange(max_insert))
+                doc, added, removed = restem(doc, doc.text[:start] + replacement + doc.text[end:])
+            _check_same(doc, stem_document(doc.text), added, removed, before)
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental re-stemming.")
+    parser.add_argument("--words", type=_positive_int, default=200_000,
+                        help="document size in words")
+    parser.add_argument("--edits", type=_positive_int, default=200, help="number of small edits")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true",
+                        help="check random edits against full re-stems instead of benchmarking")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        verify(seed=args.seed)
+        print("incremental re-stemming matches full re-stems")
+        return
+
+    rng = random.Random(args.seed)
+    base = " ".join(synthetic_corpus(args.words, seed=args.seed))
+
+    def run(edits, update):
+        doc = stem_document(base)
+        t0 = time.perf_counter()
+        for start, end, replacement in edits:
+            doc = update(doc, start, end, replacement)
+        return doc, (time.perf_counter() - t0) / len(edits)
+
+    print(f"{args.words} words, {args.edits} edits, mean time per edit:")
+    for label, local in (("local", True), ("scattered", False)):
+        edits = _make_edits(rng, base, args.edits, local)
+        full_doc, full = run(edits, lambda d, s, e, r: stem_document(d.text[:s] + r + d.text[e:]))
+        diff_doc, diffed = run(edits, lambda d, s, e, r: restem(d, d.text[:s] + r + d.text[e:])[0])
+        edit_doc, edited = run(edits, lambda d, s, e, r: apply_edit(d, s, e, r)[0])
+        _check_same(diff_doc, full_doc)
+        _check_same(edit_doc, full_doc)
+
+        print(f"  {label} edits")
+        print(f"    full re-stem  {full * 1e3:9.3f} ms")
+        print(f"    restem (diff) {diffed * 1e3:9.3f} ms  ({full / diffed:,.0f}x)")
+        print(f"    apply_edit    {edited * 1e3:9.3f} ms  ({full / edited:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
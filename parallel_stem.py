@@ -0,0 +1,217 @@
+"""Parallel batch stemming.
+
+On free-threaded (no-GIL) CPython builds the batch is split across a thread
+pool that shares one lock-striped cache, so nothing is pickled and every
+thread benefits from the others' work. On regular GIL builds threads cannot
+run the pure-Python stemmer in parallel, so the batch falls back to a process
+pool where each worker keeps its own cache.
+
+Run as a script to benchmark throughput against the number of workers:
+
+    python parallel_stem.py --words 50000 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from bench_corpus import read_corpus, synthetic_corpus
+from porter_stemmer import porter_stem
+
+MODES = ("auto", "threads", "processes", "serial")
+
+
+def gil_disabled():
+    """True when running on a free-threaded build with the GIL actually off."""
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        return False
+    # A free-threaded build re-enables the GIL if an incompatible extension loads
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or not is_gil_enabled()
+
+
+class StripedCache:
+    """Word → stem cache split into independently locked stripes.
+
+    Each lookup holds its stripe's lock across get, stem and set, so every
+    word is stemmed once however many threads ask for it. Threads working on
+    different stripes never contend.
+    """
+
+    def __init__(self, stripes=64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._maps = [{} for _ in range(stripes)]
+
+    def stem(self, word):
+        i = hash(word) % len(self._maps)
+        stems = self._maps[i]
+        with self._locks[i]:
+            stem = stems.get(word)
+            if stem is None:
+                stem = stems[word] = porter_stem(word)
+        return stem
+
+    def __len__(self):
+        return sum(len(m) for m in self._maps)
+
+
+def _stem_chunk_shared(cache, chunk):
+    stem = cache.stem
+    return [stem(word) for word in chunk]
+
+
+# Per-process cache for the process pool path; each worker fills its own and
+# keeps it for as long as the executor lives, so it is bounded
+PROCESS_CACHE_SIZE = 65536
+_process_stem = lru_cache(maxsize=PROCESS_CACHE_SIZE)(porter_stem)
+
+
+def _stem_chunk_in_process(chunk):
+    return [_process_stem(word) for word in chunk]
+
+
+def _stem_chunk_uncached(chunk):
+    return [porter_stem(word) for word in chunk]
+
+
+def _chunks(words, chunk_size):
+    return [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+
+
+def make_executor(mode="auto", workers=None):
+    """Create the pool :func:`stem_batch` would use for ``mode``.
+
+    Pass it to :func:`stem_batch` to amortize pool startup, and in process
+    mode the per-worker caches, across several batches.
+    """
+    if mode == "auto":
+        mode = "threads" if gil_disabled() else "processes"
+    if mode not in ("threads", "processes"):
+        raise ValueError(f"no executor for mode {mode!r}")
+    workers = workers or os.cpu_count() or 1
+    if mode == "threads":
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def stem_batch(words, workers=None, mode="auto", chunk_size=2048, cache=True, executor=None):
+    """Stem ``words`` in parallel and return the stems in input order.
+
+    ``mode`` is one of ``"auto"`` (threads on free-threaded builds, processes
+    otherwise, serial for one worker or one chunk), ``"threads"``,
+    ``"processes"`` or ``"serial"``. ``cache`` may be True for a fresh cache,
+    False for none, or a :class:`StripedCache` to reuse across calls in
+    thread mode.
+
+    An ``executor`` from :func:`make_executor` is used as is: its type decides
+    the mode, ``workers`` is ignored, and an explicit ``mode`` that does not
+    match it raises :class:`ValueError`. Without one, a pool is created for
+    this call.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if executor is not None:
+        executor_mode = "threads" if isinstance(executor, ThreadPoolExecutor) else "processes"
+        if mode not in ("auto", executor_mode):
+            raise ValueError(f"mode {mode!r} conflicts with a {type(executor).__name__}")
+        mode = executor_mode
+    words = list(words)
+    if executor is None and mode == "auto":
+        if workers == 1 or len(words) <= chunk_size:
+            mode = "serial"
+        else:
+            mode = "threads" if gil_disabled() else "processes"
+
+    if mode == "serial":
+        if cache is False:
+            return _stem_chunk_uncached(words)
+        shared = cache if isinstance(cache, StripedCache) else StripedCache(stripes=1)
+        return _stem_chunk_shared(shared, words)
+
+    if mode == "threads":
+        if cache is False:
+            work = _stem_chunk_uncached
+        else:
+            shared = cache if isinstance(cache, StripedCache) else StripedCache()
+            work = partial(_stem_chunk_shared, shared)
+    else:
+        work = _stem_chunk_in_process if cache is not False else _stem_chunk_uncached
+
+    chunks = _chunks(words, chunk_size)
+    if executor is not None:
+        results = executor.map(work, chunks)
+    else:
+        with make_executor(mode, workers) as pool:
+            results = list(pool.map(work, chunks))
+
+    stems = []
+    for chunk_stems in results:
+        stems.extend(chunk_stems)
+    return stems
+
+
+def _best_rate(words, repeat, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stem_batch(words, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return len(words) / best
+
+
+def _start_pool(mode, workers):
+    # Pools start workers lazily; one small task per worker brings them all up
+    start = time.perf_counter()
+    pool = make_executor(mode, workers)
+    list(pool.map(_stem_chunk_uncached, [["warming"]] * workers))
+    return pool, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parallel batch stemming.")
+    parser.add_argument("--corpus", help="text file to stem (default: synthetic words)")
+    parser.add_argument("--words", type=int, default=50_000, help="synthetic corpus size")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per point, best is kept")
+    parser.add_argument("--modes", nargs="+", default=["threads", "processes"],
+                        choices=["threads", "processes"])
+    args = parser.parse_args(argv)
+
+    words = read_corpus(args.corpus) if args.corpus else synthetic_corpus(args.words)
+    build = "free-threaded" if sysconfig.get_config_var("Py_GIL_DISABLED") else "GIL"
+    gil = "off" if gil_disabled() else "on"
+    print(f"Python {sys.version.split()[0]} ({build} build, GIL {gil}), "
+          f"{len(words)} words, {len(set(words))} distinct")
+    print("uncached: every word stemmed; cached: after one untimed warm-up run; "
+          "startup: pool creation, excluded from rates")
+
+    serial = _best_rate(words, args.repeat, mode="serial", cache=False)
+    serial_cache = StripedCache(stripes=1)
+    stem_batch(words, mode="serial", cache=serial_cache)
+    serial_cached = _best_rate(words, args.repeat, mode="serial", cache=serial_cache)
+    print(f"{'mode':<10} {'workers':>7} {'startup ms':>10} {'uncached/s':>12} {'speedup':>8} "
+          f"{'cached/s':>12} {'speedup':>8}")
+    print(f"{'serial':<10} {1:>7} {'-':>10} {serial:>12,.0f} {1.0:>8.2f} "
+          f"{serial_cached:>12,.0f} {1.0:>8.2f}")
+    for mode in args.modes:
+        workers = 1
+        while workers <= args.max_workers:
+            pool, startup = _start_pool(mode, workers)
+            with pool:
+                common = dict(executor=pool, chunk_size=args.chunk_size)
+                uncached = _best_rate(words, args.repeat, cache=False, **common)
+                shared = StripedCache()
+                stem_batch(words, cache=shared, **common)
+                cached = _best_rate(words, args.repeat, cache=shared, **common)
+            print(f"{mode:<10} {workers:>7} {startup * 1e3:>10.1f} {uncached:>12,.0f} "
+                  f"{uncached / serial:>8.2f} {cached:>12,.0f} {cached / serial_cached:>8.2f}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
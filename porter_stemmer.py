@@ -0,0 +1,210 @@
+"""Rule-based Porter stemmer with step tracking.
+
+Shared by the Streamlit demo (NLPmnrproj.py) and the batch tools, so it must
+stay free of UI imports.
+"""
+import re
+from functools import lru_cache
+
+
+def measure(word):
+    pattern = re.compile(r'([aeiouy]+[^aeiouy]+)')
+    return len(pattern.findall(word))
+
+
+# Include 'y' as a vowel to correctly handle words like 'flying'
+def contains_vowel(word):
+    return bool(re.search(r'[aeiouy]', word))
+
+
+def ends_double_consonant(word):
+    return len(word) >= 2 and word[-1] == word[-2] and word[-1] not in 'aeiou'
+
+
+def cvc(word):
+    if len(word) < 3:
+        return False
+    c1, v, c2 = word[-3], word[-2], word[-1]
+    # final consonant cannot be w, x, or y
+    return (c1 not in 'aeiou' and v in 'aeiou' and c2 not in 'aeiouwy')
+
+
+# Step 1a
+def step_1a(word, steps):
+    original = word
+    if word.endswith("sses"):
+        word = word[:-2]
+        steps.append((original, word, "1a: SSES → SS"))
+    elif word.endswith("ies"):
+        word = word[:-3] + "i"
+        steps.append((original, word, "1a: IES → I"))
+    elif word.endswith("ss"):
+        pass
+    elif word.endswith("s"):
+        word = word[:-1]
+        steps.append((original, word, "1a: S → ''"))
+    return word
+
+
+# Step 1b and post-processing
+def step_1b(word, steps):
+    original = word
+    if word.endswith("eed"):
+        stem = word[:-3]
+        if measure(stem) > 0:
+            word = stem + "ee"
+            steps.append((original, word, "1b: (m>0) EED → EE"))
+    elif word.endswith("ed"):
+        stem = word[:-2]
+        if contains_vowel(stem):
+            word = stem
+            steps.append((original, word, "1b: (v) ED → ''"))
+            word = step_1b_post_processing(word, steps)
+    elif word.endswith("ing"):
+        stem = word[:-3]
+        if contains_vowel(stem):
+            word = stem
+            steps.append((original, word, "1b: (v) ING → ''"))
+            word = step_1b_post_processing(word, steps)
+    return word
+
+
+def step_1b_post_processing(word, steps):
+    original = word
+    if word.endswith("at"):
+        word += "e"
+        steps.append((original, word, "1b Post: AT → ATE"))
+    elif word.endswith("bl"):
+        word += "e"
+        steps.append((original, word, "1b Post: BL → BLE"))
+    elif word.endswith("iz"):
+        word += "e"
+        steps.append((original, word, "1b Post: IZ → IZE"))
+    elif ends_double_consonant(word) and word[-1] not in "lsz":
+        word = word[:-1]
+        steps.append((original, word, "1b Post: double consonant → single letter"))
+    elif measure(word) == 1 and cvc(word):
+        word += "e"
+        steps.append((original, word, "1b Post: CVC and m=1 → add E"))
+    return word
+
+
+# Step 1c
+def step_1c(word, steps):
+    original = word
+    if word.endswith("y") and contains_vowel(word[:-1]):
+        word = word[:-1] + "i"
+        steps.append((original, word, "1c: (v) Y → I"))
+    return word
+
+
+# Step 2 rules
+step2_rules = {
+    "ational": "ate", "tional": "tion", "enci": "ence", "anci": "ance", "izer": "ize",
+    "abli": "able", "alli": "al", "entli": "ent", "eli": "e", "ousli": "ous",
+    "ization": "ize", "ation": "ate", "ator": "ate", "alism": "al", "iveness": "ive",
+    "fulness": "ful", "ousness": "ous", "aliti": "al", "iviti": "ive", "biliti": "ble"
+}
+
+
+def step_2(word, steps):
+    for suffix, repl in sorted(step2_rules.items(), key=lambda x: -len(x[0])):
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            if measure(stem) > 0:
+                original = word
+                word = stem + repl
+                steps.append((original, word, f"2: (m>0) {suffix.upper()} → {repl.upper()}"))
+            break
+    return word
+
+
+# Step 3 rules
+step3_rules = {
+    "icate": "ic", "ative": "", "alize": "al", "iciti": "ic",
+    "ical": "ic", "ful": "", "ness": ""
+}
+
+
+def step_3(word, steps):
+    for suffix, repl in sorted(step3_rules.items(), key=lambda x: -len(x[0])):
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            if measure(stem) > 0:
+                original = word
+                word = stem + repl
+                repl_label = repl.upper() if repl else "(null)"
+                steps.append((original, word, f"3: (m>0) {suffix.upper()} → {repl_label}"))
+            break
+    return word
+
+
+# Step 4 rules
+step4_suffixes = [
+    "al", "ance", "ence", "er", "ic", "able", "ible", "ant",
+    "ement", "ment", "ent", "ion", "ou", "ism", "ate", "iti",
+    "ous", "ive", "ize"
+]
+
+
+def step_4(word, steps):
+    for suffix in step4_suffixes:
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            if measure(stem) > 1:
+                if suffix == "ion" and (stem.endswith("s") or stem.endswith("t")):
+                    original = word
+                    word = stem
+                    steps.append((original, word, "4: (m>1 & *S/*T) ION → ''"))
+                    break
+                elif suffix != "ion":
+                    original = word
+                    word = stem
+                    steps.append((original, word, f"4: (m>1) {suffix.upper()} → ''"))
+                    break
+    return word
+
+
+# Step 5 rules
+def step_5(word, steps):
+    original = word
+    if word.endswith("e"):
+        stem = word[:-1]
+        m = measure(stem)
+        if m > 1:
+            word = stem
+            steps.append((original, word, "5: (m>1) E → ''"))
+        elif m == 1 and not cvc(stem):
+            word = stem
+            steps.append((original, word, "5: (m=1 and CVC) E → ''"))
+    elif word.endswith("ll") and measure(word) > 1:
+        word = word[:-1]
+        steps.append((original, word, "5: (m>1 and *L) LL → L"))
+    return word
+
+
+# Full Porter Stemmer with steps
+def porter_stem_with_steps(word):
+    steps = []
+    word = word.lower()
+    word = step_1a(word, steps)
+    word = step_1b(word, steps)
+    word = step_1c(word, steps)
+    word = step_2(word, steps)
+    word = step_3(word, steps)
+    word = step_4(word, steps)
+    word = step_5(word, steps)
+    return steps, word
+
+
+# Stem only, for batch use where the trace is not needed
+def porter_stem(word):
+    return porter_stem_with_steps(word)[1]
+
+
+# Memoized trace for interactive use, kept in this module so it survives
+# Streamlit reruns; steps come back as a tuple so the shared value is immutable
+@lru_cache(maxsize=4096)
+def cached_stem_with_steps(word):
+    steps, stem = porter_stem_with_steps(word)
+    return tuple(steps), stem
@@ -0,0 +1,219 @@
+"""Memory and CPU profiling for the stemming hot loop.
+
+Stems a corpus word by word and reports:
+
+* memory: blocks and bytes still held per word, the per-word transient
+  peak, the overall peak, the sites of the retained objects and the sites
+  live at the largest per-word peak (``tracemalloc``). tracemalloc only sees
+  live memory, so the number of allocations made while stemming a word (the
+  ``findall`` lists, slices and so on that are freed again) is not counted;
+  the transient peak and the peak sites are the closest view of them;
+* time: the top functions from ``cProfile``, optionally saved as a pstats
+  file and as collapsed stacks for flamegraph.pl / speedscope.
+
+The allocation and timing passes stem the same words separately so that
+tracemalloc overhead does not distort the timings. Example:
+
+    python profile_stemmer.py --words 20000 --steps --pstats stem.pstats --collapsed stem.folded
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import tracemalloc
+from collections import defaultdict
+
+from bench_corpus import read_corpus, synthetic_corpus
+from porter_stemmer import porter_stem, porter_stem_with_steps
+
+
+def _stem_all(words, stem):
+    # Preallocated so list growth does not show up among the allocation sites
+    results = [None] * len(words)
+    for i, word in enumerate(words):
+        results[i] = stem(word)
+    return results
+
+
+def _snapshot_at_peak(word, stem):
+    """Stem ``word`` again and snapshot traced memory at its highest point.
+
+    Short-lived objects such as the ``findall`` list in ``measure()`` are gone
+    by the time ``stem`` returns, so a profile hook takes a snapshot whenever
+    a call or return event sees a new high. Memory held by the stored
+    snapshot itself is subtracted before comparing.
+    """
+    baseline = tracemalloc.take_snapshot()
+    base, _ = tracemalloc.get_traced_memory()
+    best = {"size": base, "held": 0, "snapshot": baseline}
+
+    def hook(frame, event, arg):
+        current = tracemalloc.get_traced_memory()[0] - best["held"]
+        if current > best["size"]:
+            best["snapshot"] = None
+            before, _ = tracemalloc.get_traced_memory()
+            best["snapshot"] = tracemalloc.take_snapshot()
+            best["held"] = tracemalloc.get_traced_memory()[0] - before
+            best["size"] = current
+
+    sys.setprofile(hook)
+    try:
+        stem(word)
+    finally:
+        sys.setprofile(None)
+    return baseline, best["snapshot"]
+
+
+def profile_allocations(words, stem, top=10):
+    """Stem ``words`` under tracemalloc and return a dict of memory stats.
+
+    These are retained and transient (peak) sizes, not allocation counts:
+    blocks that are allocated and freed during a word leave no trace behind.
+    """
+    tracemalloc.start()
+    try:
+        results = [None] * len(words)
+        before = tracemalloc.take_snapshot()
+        transient_total = transient_max = overall_peak = 0
+        peak_word = words[0] if words else None
+        for i, word in enumerate(words):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            results[i] = stem(word)
+            _, peak = tracemalloc.get_traced_memory()
+            # reset_peak() above scopes each reading to one word, so the
+            # overall peak has to be tracked here
+            overall_peak = max(overall_peak, peak)
+            transient_total += peak - current
+            if peak - current > transient_max:
+                transient_max, peak_word = peak - current, word
+        after = tracemalloc.take_snapshot()
+        if words:
+            peak_before, peak_snapshot = _snapshot_at_peak(peak_word, stem)
+    finally:
+        tracemalloc.stop()
+
+    # Leave out tracemalloc's own bookkeeping and this module's driver code
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    peak_diff = []
+    if words:
+        peak_diff = peak_snapshot.filter_traces(ignore).compare_to(
+            peak_before.filter_traces(ignore), "lineno")
+    n = max(len(words), 1)
+    return {
+        "words": len(words),
+        "blocks_per_word": sum(d.count_diff for d in diff) / n,
+        "bytes_per_word": sum(d.size_diff for d in diff) / n,
+        "transient_peak_mean": transient_total / n,
+        "transient_peak_max": transient_max,
+        "peak": overall_peak,
+        "retained_sites": [d for d in diff if d.size_diff > 0][:top],
+        "peak_word": peak_word,
+        "peak_blocks": sum(d.count_diff for d in peak_diff if d.count_diff > 0),
+        "peak_sites": [d for d in peak_diff if d.size_diff > 0][:top],
+    }
+
+
+def profile_time(words, stem):
+    """Stem ``words`` under cProfile and return the finished profiler."""
+    profiler = cProfile.Profile()
+    profiler.runcall(_stem_all, words, stem)
+    profiler.create_stats()
+    return profiler
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapsed_stacks(stats):
+    """Turn pstats data into ``{"root;...;leaf": microseconds}`` of self time.
+
+    pstats only keeps caller→callee edges, so deeper stacks are reconstructed
+    by splitting each function's time across its callers in proportion to
+    the time spent under each one. Recursive calls are cut at the first repeat.
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    roots = [func for func, (_, _, _, _, callers) in stats.items()
+             if not any(caller in stats for caller in callers)]
+
+    folded = defaultdict(float)
+
+    def walk(func, path, share):
+        _, _, tt, _, _ = stats[func]
+        path = path + (func,)
+        folded[";".join(_frame_label(f) for f in path)] += tt * share * 1e6
+        for child, (_, _, _, edge_ct) in callees[func].items():
+            child_ct = stats[child][3]
+            if child in path or not child_ct:
+                continue
+            walk(child, path, share * edge_ct / child_ct)
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return {stack: round(us) for stack, us in folded.items() if round(us) > 0}
+
+
+def _format_bytes(n):
+    return f"{n / 1024:,.1f} KiB" if abs(n) >= 1024 else f"{n:,.0f} B"
+
+
+def _print_sites(sites):
+    for d in sites:
+        frame = d.traceback[0]
+        print(f"    {os.path.basename(frame.filename)}:{frame.lineno:<5} "
+              f"{_format_bytes(d.size_diff):>12} in {d.count_diff:,} blocks")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile allocations and time of the stemmer.")
+    parser.add_argument("--corpus", help="text file to stem (default: synthetic words)")
+    parser.add_argument("--words", type=int, default=20_000, help="synthetic corpus size")
+    parser.add_argument("--steps", action="store_true",
+                        help="keep the step trace like the app does (porter_stem_with_steps)")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites and functions to list")
+    parser.add_argument("--pstats", help="write the cProfile stats to this file")
+    parser.add_argument("--collapsed", help="write collapsed stacks (µs of self time) to this file")
+    args = parser.parse_args(argv)
+
+    words = read_corpus(args.corpus) if args.corpus else synthetic_corpus(args.words)
+    stem = porter_stem_with_steps if args.steps else porter_stem
+
+    mem = profile_allocations(words, stem, args.top)
+    print(f"Memory over {mem['words']} words ({stem.__name__}); tracemalloc sees live "
+          "memory only, so allocations freed within a word are not counted:")
+    print(f"  retained after stemming   {mem['blocks_per_word']:.2f} blocks, "
+          f"{_format_bytes(mem['bytes_per_word'])} per word")
+    print(f"  transient peak per word   mean {_format_bytes(mem['transient_peak_mean'])}, "
+          f"max {_format_bytes(mem['transient_peak_max'])}")
+    print(f"  live at the largest peak  {mem['peak_blocks']:,} blocks ({mem['peak_word']!r})")
+    print(f"  peak traced memory        {_format_bytes(mem['peak'])}")
+    print("  top sites of objects retained after stemming (results and their traces):")
+    _print_sites(mem["retained_sites"])
+    print(f"  top sites live at the largest per-word peak ({mem['peak_word']!r}, "
+          "short-lived included):")
+    _print_sites(mem["peak_sites"])
+
+    profiler = profile_time(words, stem)
+    print()
+    pstats.Stats(profiler).strip_dirs().sort_stats("tottime").print_stats(args.top)
+    if args.pstats:
+        profiler.dump_stats(args.pstats)
+        print(f"pstats written to {args.pstats}")
+    if args.collapsed:
+        with open(args.collapsed, "w", encoding="utf-8") as f:
+            for stack, us in sorted(collapsed_stacks(profiler.stats).items()):
+                f.write(f"{stack} {us}\n")
+        print(f"collapsed stacks written to {args.collapsed}")
+
+
+if __name__ == "__main__":
+    main()